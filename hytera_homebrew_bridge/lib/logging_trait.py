@@ -6,6 +6,9 @@ class LoggingTrait:
     def get_logger(self) -> logging.Logger:
         return logging.getLogger(type(self).__name__)
 
+    def is_debug_enabled(self) -> bool:
+        return self.get_logger().isEnabledFor(logging.DEBUG)
+
     def log_debug(self, msg: str):
         self.get_logger().debug(msg)
 
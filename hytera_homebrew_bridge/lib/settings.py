@@ -146,6 +146,8 @@ class BridgeSettings(LoggingTrait):
         # hytera_protocols variables
         self.hytera_is_registered: bool = False
         self.hytera_snmp_data: dict = dict()
+        # repeater ip => snmp community the repeater responded to
+        self.hytera_snmp_community: dict = dict()
 
         # hytera repeater data
         self.hytera_repeater_id: int = 0
@@ -1,9 +1,10 @@
 #!/usr/bin/env python3
 import asyncio
+import functools
 import logging
 import sys
 import warnings
-from typing import Union, Literal, Dict
+from typing import Union, Literal, Dict, List, Optional, Tuple
 
 import puresnmp
 
@@ -15,6 +16,21 @@ KNOWN_SNMP_COMMUNITIES = Union[Literal["hytera"], Literal["public"]]
 DEFAULT_SNMP_COMMUNITY = "public"
 
 
+def _print_rows(readable_labels: dict, padding: int = 5) -> Tuple[tuple, ...]:
+    """
+    Pads all labels to common width, so printing does not need to compute it
+
+    @param readable_labels: oid => (label, value format)
+    @param padding:
+    @return: tuple of (oid, padded label, value format)
+    """
+    longest_label = max(len(label) for label, _ in readable_labels.values())
+    return tuple(
+        (oid, label.ljust(longest_label + padding), value_format)
+        for oid, (label, value_format) in readable_labels.items()
+    )
+
+
 class SNMP(LoggingTrait):
     # in milli-volts (V * 1000)
     OID_PSU_VOLTAGE: str = "iso.3.6.1.4.1.40297.1.2.1.2.1.0"
@@ -77,25 +93,37 @@ class SNMP(LoggingTrait):
         OID_CUR_ZONE_ALIAS: ("Current Zone Alias", "%s"),
     }
 
-    ALL_STRINGS = (
-        OID_REPEATER_MODEL,
-        OID_MODEL_NUMBER,
-        OID_FIRMWARE_VERSION,
-        OID_RCDB_VERSION,
-        OID_RADIO_ALIAS,
-        OID_CUR_ZONE_ALIAS,
-        OID_SERIAL_NUMBER,
-        OID_CUR_CHANNEL_NAME,
+    _PRINT_ROWS = _print_rows(READABLE_LABELS)
+
+    ALL_STRINGS = frozenset(
+        (
+            OID_REPEATER_MODEL,
+            OID_MODEL_NUMBER,
+            OID_FIRMWARE_VERSION,
+            OID_RCDB_VERSION,
+            OID_RADIO_ALIAS,
+            OID_CUR_ZONE_ALIAS,
+            OID_SERIAL_NUMBER,
+            OID_CUR_CHANNEL_NAME,
+        )
     )
 
-    ALL_FLOATS = (
-        OID_PSU_VOLTAGE,
-        OID_VSWR,
-        OID_PA_TEMPERATURE,
-        OID_TX_FWD_POWER,
-        OID_TX_REF_POWER,
+    ALL_FLOATS = frozenset(
+        (
+            OID_PSU_VOLTAGE,
+            OID_VSWR,
+            OID_PA_TEMPERATURE,
+            OID_TX_FWD_POWER,
+            OID_TX_REF_POWER,
+        )
     )
 
+    # oid => function decoding raw value, OIDs not listed are stored as received
+    _DECODERS = {
+        **dict.fromkeys(ALL_STRINGS, octet_string_to_utf8),
+        **dict.fromkeys(ALL_FLOATS, functools.partial(int.from_bytes, byteorder="big")),
+    }
+
     ALL_KNOWN = (
         OID_PSU_VOLTAGE,
         OID_PA_TEMPERATURE,
@@ -118,105 +146,196 @@ class SNMP(LoggingTrait):
         OID_WORK_STATUS,
         OID_CUR_ZONE_ALIAS,
     )
+    # numeric form of ALL_KNOWN (same order), as sent in requests
+    _ALL_KNOWN_WIRE = tuple(oid.replace("iso", "1") for oid in ALL_KNOWN)
+    # numeric form of OID_SERIAL_NUMBER, used to probe community
+    _OID_SERIAL_NUMBER_WIRE: str = OID_SERIAL_NUMBER.replace("iso", "1")
 
     OID_WALK_BASE_1: str = "1.3.6.1.4.1.40297.1.2.4"
     OID_WALK_BASE_2: str = "1.3.6.1.4.1.40297.1.2.1.2"
 
+    @staticmethod
+    def _create_client(
+        ip: str, community: KNOWN_SNMP_COMMUNITIES
+    ) -> puresnmp.PyWrapper:
+        return puresnmp.PyWrapper(
+            client=puresnmp.Client(ip=ip, credentials=puresnmp.V1(community=community))
+        )
+
+    async def _probe_community(
+        self, ip: str, community: KNOWN_SNMP_COMMUNITIES, timeout: float
+    ) -> bool:
+        """
+        Checks, with single cheap GET, if repeater answers to provided community
+
+        @param ip:
+        @param community:
+        @param timeout:
+        @return: True if repeater responded in time
+        """
+        try:
+            await asyncio.wait_for(
+                fut=self._create_client(ip=ip, community=community).get(
+                    oid=SNMP._OID_SERIAL_NUMBER_WIRE
+                ),
+                timeout=timeout,
+            )
+            return True
+        except (
+            puresnmp.exc.Timeout,
+            asyncio.exceptions.TimeoutError,
+            TimeoutError,
+        ):
+            self.log_debug("SNMP community %s failed for %s" % (community, ip))
+            return False
+
+    async def _fetch(
+        self,
+        ip: str,
+        settings_storage: BridgeSettings,
+        snmp_community: KNOWN_SNMP_COMMUNITIES,
+        timeout_secs: float,
+    ) -> Optional[List[any]]:
+        """
+        Finds working community (if not known already) and fetches raw values of ALL_KNOWN
+
+        @param ip:
+        @param settings_storage:
+        @param snmp_community: community to be probed first
+        @param timeout_secs: each community probe gets half of it, so both fit in walk deadline
+        @return: raw values in order of ALL_KNOWN or None if no community works
+        """
+        # noinspection PyTypeChecker
+        other_community: KNOWN_SNMP_COMMUNITIES = (
+            "public" if snmp_community == "hytera" else "hytera"
+        )
+        # community the repeater responded to before does not need to be probed again
+        community = settings_storage.hytera_snmp_community.get(ip)
+
+        if not community:
+            for candidate in (snmp_community, other_community):
+                if await self._probe_community(
+                    ip=ip, community=candidate, timeout=timeout_secs / 2
+                ):
+                    community = candidate
+                    break
+            else:
+                self.log_error(
+                    "SNMP failed, repeater %s does not respond to communities %s"
+                    % (ip, (snmp_community, other_community))
+                )
+                return None
+            settings_storage.hytera_snmp_community[ip] = community
+
+        client = self._create_client(ip=ip, community=community)
+        # all known OIDs as varbinds of single GetRequest PDU, one round-trip per walk
+        # (GetBulk is not available, repeaters are queried with SNMPv1 credentials)
+        return await client.multiget(oids=list(SNMP._ALL_KNOWN_WIRE))
+
     async def walk_ip(
         self,
         ip: str,
         settings_storage: BridgeSettings,
         snmp_community: KNOWN_SNMP_COMMUNITIES = DEFAULT_SNMP_COMMUNITY,
-        first_try: bool = True,
         timeout_secs: int = 2,
     ) -> Dict[str, any]:
         is_success: bool = False
 
         snmp_data: Dict[str, any] = {}
 
-        # noinspection PyTypeChecker
-        other_community: KNOWN_SNMP_COMMUNITIES = (
-            "public" if snmp_community == "hytera" else "hytera"
-        )
-        client = puresnmp.PyWrapper(
-            client=puresnmp.Client(
-                ip=ip, credentials=puresnmp.V1(community=snmp_community)
-            )
-        )
-
         # noinspection PyBroadException
         try:
-            for oid in SNMP.ALL_KNOWN:
-                _oid = oid.replace("iso", "1")
-                snmp_result = await asyncio.wait_for(
-                    fut=client.get(oid=_oid), timeout=timeout_secs
-                )
-
-                if oid in SNMP.ALL_STRINGS:
-                    snmp_result = octet_string_to_utf8(str(snmp_result, "utf8"))
-                elif oid in SNMP.ALL_FLOATS:
-                    snmp_result = int.from_bytes(snmp_result, byteorder="big")
-                snmp_data[oid] = snmp_result
+            # single deadline for whole walk, including community probing
+            snmp_results = await asyncio.wait_for(
+                fut=self._fetch(
+                    ip=ip,
+                    settings_storage=settings_storage,
+                    snmp_community=snmp_community,
+                    timeout_secs=timeout_secs,
+                ),
+                timeout=timeout_secs * 2,
+            )
+            if snmp_results is None:
+                return snmp_data
+            for oid, snmp_result in zip(SNMP.ALL_KNOWN, snmp_results):
+                decoder = SNMP._DECODERS.get(oid)
+                snmp_data[oid] = decoder(snmp_result) if decoder else snmp_result
             is_success = True
+        except asyncio.CancelledError:
+            raise
         except ConnectionRefusedError:
             self.log_error("SNMP failed, Connection to port 162 was refused")
         except SystemError as se:
             self.log_error("SNMP failed to obtain repeater info")
             self.log_exception(se)
         except (
-            asyncio.exceptions.CancelledError,
             puresnmp.exc.Timeout,
             asyncio.exceptions.TimeoutError,
             TimeoutError,
         ) as e:
-            if first_try:
-                self.log_debug(
-                    "Failed with SNMP family %s, trying with %s as well"
-                    % (snmp_community, other_community)
-                )
-                await self.walk_ip(
-                    ip=ip,
-                    settings_storage=settings_storage,
-                    first_try=False,
-                    snmp_community=other_community,
-                )
-            else:
-                self.log_error("SNMP failed")
-                self.log_exception(e)
-        except:
-            self.log_exception("Unhandled exception")
-            self.log_exception(sys.exc_info())
+            # forget the community, next walk will probe again
+            settings_storage.hytera_snmp_community.pop(ip, None)
+            self.log_error("SNMP failed")
+            self.log_exception(e)
+        except Exception as e:
+            self.log_error("SNMP failed with unhandled exception")
+            self.log_exception(e)
 
         if is_success:
             # set data to storage
-            for key, value in snmp_data.items():
-                settings_storage.hytera_snmp_data[key] = value
+            settings_storage.hytera_snmp_data.update(snmp_data)
             # print from storage
             self.print_snmp_data(settings_storage)
 
         return snmp_data
 
+    async def walk_ips(
+        self,
+        settings_storages: Dict[str, BridgeSettings],
+        snmp_community: KNOWN_SNMP_COMMUNITIES = DEFAULT_SNMP_COMMUNITY,
+        timeout_secs: int = 2,
+        concurrency: int = 32,
+    ) -> Dict[str, Union[Dict[str, any], BaseException]]:
+        """
+        Walks multiple repeaters concurrently
+
+        @param settings_storages: repeater ip => settings (storage) of that repeater
+        @param snmp_community:
+        @param timeout_secs:
+        @param concurrency: max number of walks in progress at once
+        @return: repeater ip => walk result or exception raised by the walk
+        """
+        # cap number of concurrent UDP flows, walks themselves are pure network I/O
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def _walk_ip(ip: str, settings_storage: BridgeSettings) -> Dict[str, any]:
+            async with semaphore:
+                return await self.walk_ip(
+                    ip=ip,
+                    settings_storage=settings_storage,
+                    snmp_community=snmp_community,
+                    timeout_secs=timeout_secs,
+                )
+
+        results = await asyncio.gather(
+            *[
+                _walk_ip(ip=ip, settings_storage=settings_storage)
+                for ip, settings_storage in settings_storages.items()
+            ],
+            return_exceptions=True,
+        )
+        return dict(zip(settings_storages.keys(), results))
+
     def print_snmp_data(self, settings_storage: BridgeSettings):
+        if not self.is_debug_enabled():
+            return
         self.log_debug(
             "-------------- REPEATER SNMP CONFIGURATION ----------------------------"
         )
-        longest_label = 0
-        for key in SNMP.READABLE_LABELS:
-            label_len = len(SNMP.READABLE_LABELS.get(key)[0])
-            if label_len > longest_label:
-                longest_label = label_len
-
-        for key in settings_storage.hytera_snmp_data:
-            print_settings = SNMP.READABLE_LABELS.get(key)
-            if print_settings:
-                value = settings_storage.hytera_snmp_data.get(key)
-                self.log_debug(
-                    "%s| %s"
-                    % (
-                        str(print_settings[0]).ljust(longest_label + 5),
-                        print_settings[1] % value,
-                    )
-                )
+        for oid, label, value_format in SNMP._PRINT_ROWS:
+            value = settings_storage.hytera_snmp_data.get(oid)
+            if value is not None:
+                self.log_debug(f"{label}| {value_format % value}")
         self.log_debug(
             "-------------- REPEATER SNMP CONFIGURATION ----------------------------"
         )
@@ -224,7 +343,7 @@ class SNMP(LoggingTrait):
 
 if __name__ == "__main__":
     if len(sys.argv) < 2:
-        print("use as snmp.py <ip of hytera repeater>")
+        print("use as snmp.py <ip of hytera repeater> [<ip of hytera repeater> ...]")
         exit(1)
 
     logging.basicConfig(level=logging.NOTSET)
@@ -232,5 +351,9 @@ if __name__ == "__main__":
 
     warnings.filterwarnings("ignore", category=UserWarning, module="puresnmp_plugins")
 
-    settings: BridgeSettings = BridgeSettings(filedata=BridgeSettings.MINIMAL_SETTINGS)
-    asyncio.run(SNMP().walk_ip(sys.argv[1], settings_storage=settings))
+    # BridgeSettings describes single repeater, so each walked repeater gets its own
+    settings: Dict[str, BridgeSettings] = {
+        ip: BridgeSettings(filedata=BridgeSettings.MINIMAL_SETTINGS)
+        for ip in sys.argv[1:]
+    }
+    asyncio.run(SNMP().walk_ips(settings_storages=settings))
@@ -1,6 +1,7 @@
 #!/usr/bin/env python3
 import logging
 import string
+from typing import Union
 
 from kaitaistruct import KaitaiStruct
 
@@ -87,8 +88,13 @@ def hytpatcher_byte_swap(pl: bytes) -> bytes:
     )
 
 
-def octet_string_to_utf8(octets: str) -> str:
-    return "".join(filter(lambda c: c in string.printable, octets))
+_PRINTABLE_CHARACTERS = frozenset(string.printable)
+
+
+def octet_string_to_utf8(octets: Union[str, bytes]) -> str:
+    if isinstance(octets, bytes):
+        octets = octets.decode("utf-8", errors="replace")
+    return "".join(c for c in octets if c in _PRINTABLE_CHARACTERS)
 
 
 def parse_hytera_data(bytedata: bytes) -> KaitaiStruct:
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+import os
+import sys
+from typing import List
+
+import puresnmp
+import pytest
+
+try:
+    import hytera_homebrew_bridge
+except ImportError:
+    sys.path.append(
+        os.path.dirname(os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+    )
+
+from hytera_homebrew_bridge.lib.settings import BridgeSettings
+from hytera_homebrew_bridge.lib.snmp import SNMP
+
+
+class FakeRepeater:
+    """
+    Stands in for puresnmp.PyWrapper, answers only to configured community
+    """
+
+    def __init__(self, community: str):
+        self.community: str = community
+        self.multiget_times_out: bool = False
+        self.calls: List[tuple] = []
+
+    def client(self, ip: str, community: str) -> "FakeRepeater.Client":
+        return FakeRepeater.Client(repeater=self, community=community)
+
+    class Client:
+        def __init__(self, repeater: "FakeRepeater", community: str):
+            self.repeater = repeater
+            self.community = community
+
+        async def get(self, oid: str):
+            self.repeater.calls.append(("get", self.community))
+            if self.community != self.repeater.community:
+                raise puresnmp.exc.Timeout("no response")
+            return b"SERIAL123"
+
+        async def multiget(self, oids: List[str]) -> list:
+            self.repeater.calls.append(("multiget", self.community))
+            if self.community != self.repeater.community:
+                raise puresnmp.exc.Timeout("no response")
+            if self.repeater.multiget_times_out:
+                raise puresnmp.exc.Timeout("no response")
+            return [FakeRepeater.raw_value(oid) for oid in SNMP.ALL_KNOWN]
+
+    @staticmethod
+    def raw_value(oid: str):
+        if oid in SNMP.ALL_STRINGS:
+            return b"RD985"
+        if oid in SNMP.ALL_FLOATS:
+            return (13000).to_bytes(2, byteorder="big")
+        return 1
+
+
+@pytest.fixture
+def settings() -> BridgeSettings:
+    return BridgeSettings(filedata=BridgeSettings.MINIMAL_SETTINGS)
+
+
+@pytest.fixture
+def repeater(monkeypatch) -> FakeRepeater:
+    fake = FakeRepeater(community="public")
+    monkeypatch.setattr(SNMP, "_create_client", staticmethod(fake.client))
+    return fake
+
+
+@pytest.mark.asyncio
+async def test_walk_ip_falls_back_to_other_community(
+    settings: BridgeSettings, repeater: FakeRepeater
+):
+    data = await SNMP().walk_ip("10.0.0.1", settings, snmp_community="hytera")
+
+    assert data[SNMP.OID_RADIO_ALIAS] == "RD985"
+    assert data[SNMP.OID_PSU_VOLTAGE] == 13000
+    assert settings.hytera_snmp_data == data
+    assert settings.hytera_snmp_community == {"10.0.0.1": "public"}
+    assert repeater.calls == [
+        ("get", "hytera"),
+        ("get", "public"),
+        ("multiget", "public"),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_walk_ip_skips_probe_with_known_community(
+    settings: BridgeSettings, repeater: FakeRepeater
+):
+    settings.hytera_snmp_community["10.0.0.1"] = "public"
+
+    data = await SNMP().walk_ip("10.0.0.1", settings, snmp_community="hytera")
+
+    assert len(data) == len(SNMP.ALL_KNOWN)
+    assert repeater.calls == [("multiget", "public")]
+
+
+@pytest.mark.asyncio
+async def test_walk_ip_forgets_community_on_timeout(
+    settings: BridgeSettings, repeater: FakeRepeater
+):
+    settings.hytera_snmp_community["10.0.0.1"] = "public"
+    repeater.multiget_times_out = True
+
+    data = await SNMP().walk_ip("10.0.0.1", settings)
+
+    assert data == {}
+    assert settings.hytera_snmp_data == {}
+    assert "10.0.0.1" not in settings.hytera_snmp_community
+
+
+@pytest.mark.asyncio
+async def test_walk_ip_no_community_works(
+    settings: BridgeSettings, repeater: FakeRepeater
+):
+    repeater.community = "private"
+
+    data = await SNMP().walk_ip("10.0.0.1", settings)
+
+    assert data == {}
+    assert settings.hytera_snmp_community == {}
+    assert repeater.calls == [("get", "public"), ("get", "hytera")]
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__]))
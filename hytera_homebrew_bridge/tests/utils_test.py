@@ -0,0 +1,31 @@
+#!/usr/bin/env python3
+import os
+import sys
+
+try:
+    import hytera_homebrew_bridge
+except ImportError:
+    sys.path.append(
+        os.path.dirname(os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+    )
+
+from hytera_homebrew_bridge.lib.utils import octet_string_to_utf8
+
+
+def test_octet_string_to_utf8_str():
+    assert octet_string_to_utf8("RD985\x00\x01") == "RD985"
+
+
+def test_octet_string_to_utf8_bytes():
+    assert octet_string_to_utf8(b"OK1ABC\x00\x00") == "OK1ABC"
+
+
+def test_octet_string_to_utf8_invalid_utf8():
+    # invalid sequences are replaced during decoding and then filtered out as non-printable
+    assert octet_string_to_utf8(b"OK\xff1\xc3ABC") == "OK1ABC"
+
+
+if __name__ == "__main__":
+    test_octet_string_to_utf8_str()
+    test_octet_string_to_utf8_bytes()
+    test_octet_string_to_utf8_invalid_utf8()